@@ -0,0 +1,110 @@
+"""
+One-off conversion of the pickled model to a faster-loading/serving format.
+
+joblib: arrays are stored uncompressed so util.load_artifacts can memory-map
+them (joblib.load(..., mmap_mode='r')); under gunicorn --preload the mapped
+pages are shared by all workers through the page cache.
+
+    python convert_model.py "Real Estate Data V21.pickle" "Real Estate Data V21.joblib"
+
+ONNX (requires skl2onnx): util.load_artifacts serves .onnx models through
+ONNX Runtime (requires onnxruntime).
+
+    python convert_model.py "Real Estate Data V21.pickle" model.onnx
+
+Add --int8 to also write a dynamically quantized model.int8.onnx (served when
+MODEL_QUANT=int8). It is only kept if its predictions stay within 1% of the
+fp32 model on one probe input per location.
+
+The output format follows the output file's extension. Then point MODEL_PATH
+at the new file.
+"""
+
+import argparse
+import pickle
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+
+def convert_to_joblib(pickle_path: str, joblib_path: str):
+    """Re-save a pickled estimator with joblib, leaving arrays uncompressed (required for mmap)."""
+    with open(pickle_path, 'rb') as f:
+        model = pickle.load(f)
+    joblib.dump(model, joblib_path, compress=0)
+
+
+def convert_to_onnx(pickle_path: str, onnx_path: str, quantizable: bool = False):
+    """
+    Convert a pickled sklearn estimator to ONNX with a float32 [None, n_features] input 'X'.
+    quantizable: emit MatMul/Add instead of ai.onnx.ml's LinearRegressor, which has no int8 kernel.
+    """
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+
+    with open(pickle_path, 'rb') as f:
+        model = pickle.load(f)
+    onx = convert_sklearn(model, initial_types=[('X', FloatTensorType([None, model.n_features_in_]))],
+                          black_op={'LinearRegressor'} if quantizable else None)
+    with open(onnx_path, 'wb') as f:
+        f.write(onx.SerializeToString())
+
+
+def quantize_onnx(onnx_path: str, int8_path: str, max_rel_error: float = 0.01) -> float:
+    """
+    Dynamically quantize an ONNX model to int8 and check it against the fp32 model.
+    The probe batch has one row per location (sqft=1000, 2 BHK, 2 baths); if any int8
+    prediction is off by more than max_rel_error the int8 file is removed and ValueError raised.
+    Returns the worst relative error.
+    """
+    import onnxruntime as ort
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QInt8)
+
+    fp32 = ort.InferenceSession(onnx_path, providers=['CPUExecutionProvider'])
+    int8 = ort.InferenceSession(int8_path, providers=['CPUExecutionProvider'])
+    input_name = fp32.get_inputs()[0].name
+    n_features = fp32.get_inputs()[0].shape[1]
+
+    # NOTE: same column layout as util.predict_price (3 numeric columns, then locations)
+    X = np.zeros((n_features - 3, n_features), dtype=np.float32)
+    X[:, 0], X[:, 1], X[:, 2] = 1000, 2, 2
+    X[np.arange(n_features - 3), np.arange(3, n_features)] = 1.0
+
+    expected = fp32.run(None, {input_name: X})[0].ravel()
+    actual = int8.run(None, {input_name: X})[0].ravel()
+    rel_error = float(np.max(np.abs(actual - expected) / np.maximum(np.abs(expected), 1.0)))
+    if rel_error > max_rel_error:
+        Path(int8_path).unlink()
+        raise ValueError(f"int8 model deviates from fp32 by up to {rel_error:.1%}")
+    return rel_error
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('pickle_path', help='existing pickled model')
+    parser.add_argument('output_path', help='output file (.onnx for ONNX, anything else for joblib)')
+    parser.add_argument('--int8', action='store_true', help='also write an int8-quantized <output>.int8.onnx')
+    args = parser.parse_args()
+
+    if args.output_path.endswith('.onnx'):
+        convert_to_onnx(args.pickle_path, args.output_path, quantizable=args.int8)
+    elif args.int8:
+        parser.error('--int8 requires an .onnx output path')
+    else:
+        convert_to_joblib(args.pickle_path, args.output_path)
+    print(f"Saved {args.output_path}")
+
+    if args.int8:
+        int8_path = str(Path(args.output_path).with_suffix('.int8.onnx'))
+        try:
+            rel_error = quantize_onnx(args.output_path, int8_path)
+        except ValueError as e:
+            parser.exit(1, f"int8 quantization rejected: {e}. The fp32 model {args.output_path} was kept.\n")
+        print(f"Saved {int8_path} (max relative error vs fp32: {rel_error:.2%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,19 @@
+"""
+Gunicorn settings for serving the price prediction API.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Equivalent to:
+    gunicorn -k gevent -w $(nproc) --worker-connections 1000 --preload wsgi:app
+"""
+
+import multiprocessing
+import os
+
+bind = f"{os.getenv('FLASK_HOST', '0.0.0.0')}:{os.getenv('FLASK_PORT', '5001')}"
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'gevent'
+worker_connections = 1000
+
+# Import wsgi (and load the model) in the master before forking workers
+preload_app = True
@@ -9,54 +9,96 @@ Features robust error handling, flexible input validation, and comprehensive log
 
 import sys
 import os
+import atexit
+import hashlib
+import math
 import logging
-from pathlib import Path
+import logging.handlers
+import queue
 from typing import Dict, Any, Optional, Union
 
-from flask import Flask, request, jsonify, Response
+import orjson
+from flask import Flask, request, Response
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 import util
 
-# Configure logging
+# Configure logging: request threads only enqueue records; a background listener
+# thread does the (locked, blocking) writes to stdout and server.log
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_handlers = [
+    logging.StreamHandler(sys.stdout),
+    logging.FileHandler('server.log', mode='a')
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+_queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('server.log', mode='a')
-    ]
+    format='%(message)s',  # final formatting happens in the listener's handlers
+    handlers=[_queue_handler]
 )
 logger = logging.getLogger(__name__)
+_log_listener = None
+
+
+def start_log_listener():
+    """
+    Start the thread draining queued log records. Threads do not survive fork(),
+    so forked workers (gunicorn --preload) start their own listener on a fresh queue.
+    """
+    global _log_listener
+    _queue_handler.queue = queue.SimpleQueue()
+    _log_listener = logging.handlers.QueueListener(_queue_handler.queue, *_log_handlers)
+    _log_listener.start()
+
+
+start_log_listener()
+os.register_at_fork(after_in_child=start_log_listener)
+atexit.register(lambda: _log_listener.stop())  # flush pending records on shutdown
+
+
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson, for Flask's own JSON handling (jsonify, get_json)."""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
 
 # Initialize Flask app
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 CORS(app, origins=['*'])  # Enable CORS for all origins
 
+
+def ojson(payload: Any, status: int = 200) -> Response:
+    """
+    JSON response straight from orjson's bytes; used instead of jsonify(), which
+    goes through the provider's str round-trip and argument handling.
+    """
+    return app.response_class(orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY),
+                              status=status, mimetype='application/json')
+
+
 # Configuration
 CONFIG = {
     'HOST': os.getenv('FLASK_HOST', '0.0.0.0'),
     'PORT': int(os.getenv('FLASK_PORT', 5001)),
     'DEBUG': os.getenv('FLASK_DEBUG', 'True').lower() == 'true',
     'COLUMNS_PATH': os.getenv('COLUMNS_PATH', './Columnsnew.json'),
-    'MODEL_PATH': os.getenv('MODEL_PATH', './Real Estate Data V21.pickle')
+    'MODEL_PATH': os.getenv('MODEL_PATH', './Real Estate Data V21.pickle'),
+    'MODEL_QUANT': os.getenv('MODEL_QUANT', 'fp32'),  # 'int8' serves the quantized ONNX model
+    'MAX_BATCH_SIZE': int(os.getenv('MAX_BATCH_SIZE', 1000)),
+    'MAX_BODY_BYTES': int(os.getenv('MAX_BODY_BYTES', 4096)),  # a single prediction is ~200 bytes
+    'MAX_BATCH_BODY_BYTES': int(os.getenv('MAX_BATCH_BODY_BYTES', 512 * 1024))
 }
 
-
-def validate_paths() -> bool:
-    """Validate that required model files exist."""
-    columns_path = Path(CONFIG['COLUMNS_PATH'])
-    model_path = Path(CONFIG['MODEL_PATH'])
-    
-    if not columns_path.exists():
-        logger.error(f"Columns file not found: {columns_path.absolute()}")
-        return False
-    
-    if not model_path.exists():
-        logger.error(f"Model file not found: {model_path.absolute()}")
-        return False
-    
-    logger.info(f"Model files validated: {columns_path.absolute()}, {model_path.absolute()}")
-    return True
+# Content-Types accepted by the predict endpoints besides JSON
+FORM_MIMETYPES = ('application/x-www-form-urlencoded', 'multipart/form-data')
 
 
 def safe_type_conversion(value: Any, target_type: type, field_name: str) -> Any:
@@ -76,24 +118,59 @@ def safe_type_conversion(value: Any, target_type: type, field_name: str) -> Any:
         raise ValueError(f"Invalid {field_name}: '{value}' cannot be converted to {target_type.__name__}")
 
 
-def extract_input_data(request_obj) -> Dict[str, Any]:
-    """Extract and normalize input data from request (JSON or form-data)."""
-    data = {}
+def reject_request_body(request_obj, max_bytes: int) -> Optional[Response]:
+    """
+    Header-only checks run before the body is read or parsed.
+    Returns an error response for oversized bodies or unsupported Content-Types, else None.
+    """
+    if request_obj.content_length and request_obj.content_length > max_bytes:
+        return ojson({
+            'error': 'Payload too large',
+            'message': f'Request body must not exceed {max_bytes} bytes'
+        }, 413)
+    
+    mimetype = request_obj.mimetype
+    if mimetype and not request_obj.is_json and mimetype not in FORM_MIMETYPES:
+        return ojson({
+            'error': 'Unsupported media type',
+            'message': f"Expected application/json or form data, got '{mimetype}'"
+        }, 415)
     
-    # Try JSON first, then form data
-    if request_obj.is_json:
-        data = request_obj.get_json(silent=True) or {}
+    return None
+
+
+def parse_request_body(request_obj, max_bytes: int) -> Any:
+    """
+    Parse the request body exactly once, choosing the parser from the Content-Type:
+    JSON (or no Content-Type) goes through orjson, anything else through the form parser.
+    Returns None for an empty or invalid JSON body.
+    Chunked bodies have no Content-Length to check up front, so the stream is read at
+    most one byte past max_bytes and RequestEntityTooLarge (413) is raised if it got there.
+    """
+    request_obj.max_content_length = max_bytes + 1
+    if request_obj.is_json or not request_obj.mimetype:
+        body = request_obj.get_data(cache=False)
+        data = None
+        if body:
+            try:
+                data = orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
     else:
-        # Convert form data to dict
-        data = dict(request_obj.form)
-        # If form is empty, try to force JSON parsing
-        if not data:
-            data = request_obj.get_json(force=True, silent=True) or {}
+        data = request_obj.form.to_dict()
+    if request_obj.stream.tell() > max_bytes:
+        raise RequestEntityTooLarge(f'Request body must not exceed {max_bytes} bytes')
+    return data
+
+
+def extract_input_data(request_obj) -> Dict[str, Any]:
+    """Extract and normalize input data from request (JSON or form-data)."""
+    data = parse_request_body(request_obj, CONFIG['MAX_BODY_BYTES']) or {}
     
     if not data:
         raise ValueError("No input data provided in request")
     
-    logger.info(f"Extracted raw input data: {data}")
+    logger.debug("Extracted raw input data: %s", data)
     return data
 
 
@@ -104,27 +181,45 @@ def get_flexible_key(data: Dict[str, Any], possible_keys: list) -> Optional[str]
         if key in data and data[key] not in (None, "", "null"):
             return str(data[key]).strip()
     
-    # Then try case-insensitive matches
-    data_lower = {k.lower(): v for k, v in data.items()}
+    # Then try case-insensitive matches, without copying the payload into a lowercased dict
     for key in possible_keys:
         key_lower = key.lower()
-        if key_lower in data_lower and data_lower[key_lower] not in (None, "", "null"):
-            return str(data_lower[key_lower]).strip()
+        for data_key, value in data.items():
+            if data_key.lower() == key_lower and value not in (None, "", "null"):
+                return str(value).strip()
     
     return None
 
 
+def parse_prediction_input(data: Dict[str, Any]) -> tuple:
+    """
+    Convert one request payload into util's (location, sqft, bhk, baths) input.
+    Raises KeyError/TypeError/ValueError on missing or invalid fields.
+    """
+    total_sqft = float(data.get('total_sqft') or data.get('totalSqft'))
+    if not math.isfinite(total_sqft):
+        raise ValueError(f"Invalid total_sqft: '{total_sqft}' is not a finite number")
+    location = data['location']
+    if location is not None and not isinstance(location, str):
+        raise ValueError(f"Invalid location: expected a string, got {type(location).__name__}")
+    bhk = int(data.get('bhk'))
+    bath = int(data.get('bath'))
+    return location, total_sqft, bhk, bath
+
+
 @app.route('/', methods=['GET'])
 def home() -> Response:
     """Home endpoint with API information."""
-    return jsonify({
+    return ojson({
         'message': '🏠 Real Estate Price Prediction API',
         'version': '2.0',
         'status': 'running',
         'endpoints': {
             'health': f"http://localhost:{CONFIG['PORT']}/health",
             'locations': f"http://localhost:{CONFIG['PORT']}/get_location_names",
-            'predict': f"http://localhost:{CONFIG['PORT']}/predict_home_price"
+            'predict': f"http://localhost:{CONFIG['PORT']}/predict_home_price",
+            'predict_batch': f"http://localhost:{CONFIG['PORT']}/predict_home_price_batch",
+            'cache_stats': f"http://localhost:{CONFIG['PORT']}/cache_stats"
         },
         'usage': {
             'predict_example': {
@@ -144,26 +239,37 @@ def home() -> Response:
 @app.errorhandler(404)
 def not_found(error) -> Response:
     """Handle 404 errors."""
-    return jsonify({
+    return ojson({
         'error': 'Endpoint not found',
         'message': f'The requested URL was not found on the server',
         'available_endpoints': [
             f"GET http://localhost:{CONFIG['PORT']}/",
             f"GET http://localhost:{CONFIG['PORT']}/health",
             f"GET http://localhost:{CONFIG['PORT']}/get_location_names",
-            f"POST http://localhost:{CONFIG['PORT']}/predict_home_price"
+            f"POST http://localhost:{CONFIG['PORT']}/predict_home_price",
+            f"POST http://localhost:{CONFIG['PORT']}/predict_home_price_batch",
+            f"GET http://localhost:{CONFIG['PORT']}/cache_stats"
         ]
-    }), 404
+    }, 404)
+
+
+@app.errorhandler(413)
+def payload_too_large(error) -> Response:
+    """Handle bodies found to exceed the size limit while being read."""
+    return ojson({
+        'error': 'Payload too large',
+        'message': error.description
+    }, 413)
 
 
 @app.errorhandler(500)
 def internal_error(error) -> Response:
     """Handle 500 errors."""
     logger.error(f"Internal server error: {error}")
-    return jsonify({
+    return ojson({
         'error': 'Internal server error',
         'message': 'An unexpected error occurred on the server'
-    }), 500
+    }, 500)
 
 
 @app.route('/health', methods=['GET'])
@@ -172,7 +278,7 @@ def health_check() -> Response:
     try:
         # Test if model artifacts can be loaded
         locations_count = len(util.get_location_names())
-        return jsonify({
+        return ojson({
             'status': 'healthy',
             'message': 'Server is running successfully',
             'locations_loaded': locations_count,
@@ -180,82 +286,134 @@ def health_check() -> Response:
         })
     except Exception as e:
         logger.error(f"Health check failed: {e}")
-        return jsonify({
+        return ojson({
             'status': 'unhealthy',
             'message': 'Server is experiencing issues',
             'error': str(e)
-        }), 503
+        }, 503)
 
 
-@app.route('/get_location_names', methods=['GET'])
-def get_location_names() -> Response:
-    """Get all available location names."""
-    try:
-        logger.info("Fetching location names...")
+# Serialized /get_location_names body and its ETag; the list never changes once loaded
+_locations_response = None
+
+
+def get_locations_response() -> tuple:
+    """Return (body, etag) for the location list, serializing it only on first use."""
+    global _locations_response
+    if _locations_response is None:
         locations = util.get_location_names()
         
         if not locations:
             logger.warning("No locations found in the dataset")
-            return jsonify({
+            payload = {
                 'locations': [],
                 'count': 0,
                 'message': 'No locations available'
-            })
+            }
+        else:
+            logger.info(f"Successfully retrieved {len(locations)} locations")
+            payload = {
+                'locations': locations,
+                'count': len(locations),
+                'message': 'Locations retrieved successfully'
+            }
         
-        logger.info(f"Successfully retrieved {len(locations)} locations")
-        return jsonify({
-            'locations': locations,
-            'count': len(locations),
-            'message': 'Locations retrieved successfully'
-        })
+        body = orjson.dumps(payload)
+        _locations_response = (body, hashlib.sha1(body).hexdigest())
+    return _locations_response
+
+
+@app.route('/get_location_names', methods=['GET'])
+def get_location_names() -> Response:
+    """Get all available location names (prebuilt payload, cacheable by clients)."""
+    try:
+        logger.debug("Fetching location names...")
+        body, etag = get_locations_response()
+        
+        response = Response(body, mimetype='application/json')
+        response.headers['Cache-Control'] = 'public, max-age=3600'
+        response.set_etag(etag)
+        # answers 304 Not Modified when the client's If-None-Match matches
+        return response.make_conditional(request)
         
     except Exception as e:
         logger.error(f"Failed to get location names: {e}")
-        return jsonify({
+        return ojson({
             'error': 'Failed to retrieve locations',
             'message': str(e),
             'locations': [],
             'count': 0
-        }), 500
+        }, 500)
+
+
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats() -> Response:
+    """Prediction cache statistics (hits, misses, maxsize, currsize)."""
+    return ojson(util.get_cache_stats())
 
 
 @app.route('/predict_home_price', methods=['POST'])
 def predict_home_price():
-    # Accept form-data or JSON
-    data = request.form.to_dict() if request.form else request.get_json(force=True, silent=True)
+    # Accept form-data or JSON; reject oversized/unexpected bodies before parsing
+    rejection = reject_request_body(request, CONFIG['MAX_BODY_BYTES'])
+    if rejection:
+        return rejection
+    data = parse_request_body(request, CONFIG['MAX_BODY_BYTES'])
     if not data:
-        return jsonify({'error': 'No input data provided'}), 400
+        return ojson({'error': 'No input data provided'}, 400)
     try:
-        total_sqft = float(data.get('total_sqft') or data.get('totalSqft'))
-        location = data['location']
-        bhk = int(data.get('bhk'))
-        bath = int(data.get('bath'))
-    except (KeyError, TypeError, ValueError) as e:
-        return jsonify({'error': 'Invalid input', 'message': str(e)}), 400
+        location, total_sqft, bhk, bath = parse_prediction_input(data)
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        return ojson({'error': 'Invalid input', 'message': str(e)}, 400)
 
     try:
         est_price = util.predict_price(location, total_sqft, bhk, bath)
-        return jsonify({'Estimated_Price': est_price})
+        return ojson({'Estimated_Price': est_price})
+    except Exception as e:
+        return ojson({'error': 'Prediction failed', 'message': str(e)}, 500)
+
+
+@app.route('/predict_home_price_batch', methods=['POST'])
+def predict_home_price_batch():
+    """Predict prices for {"items": [{...}, ...]} with a single model call."""
+    rejection = reject_request_body(request, CONFIG['MAX_BATCH_BODY_BYTES'])
+    if rejection:
+        return rejection
+    data = parse_request_body(request, CONFIG['MAX_BATCH_BODY_BYTES'])
+    items = data.get('items') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return ojson({'error': 'No input data provided', 'message': "Expected a non-empty 'items' list"}, 400)
+    if len(items) > CONFIG['MAX_BATCH_SIZE']:
+        return ojson({'error': 'Batch too large', 'message': f"At most {CONFIG['MAX_BATCH_SIZE']} items per request"}, 400)
+    rows = []
+    for index, item in enumerate(items):
+        try:
+            rows.append(parse_prediction_input(item))
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            return ojson({'error': 'Invalid input', 'message': f'items[{index}]: {e}', 'index': index}, 400)
+
+    try:
+        prices = util.predict_prices(rows)
+        return ojson({'Estimated_Prices': [util.format_price(price) for price in prices]})
     except Exception as e:
-        return jsonify({'error': 'Prediction failed', 'message': str(e)}), 500
+        return ojson({'error': 'Prediction failed', 'message': str(e)}, 500)
 
 
 def initialize_server():
     """Initialize server components."""
     logger.info("Initializing server...")
     
-    # Validate paths
-    if not validate_paths():
-        logger.error("Path validation failed. Server may not function correctly.")
-        return False
-    
-    # Pre-load artifacts to reduce first-request latency
+    # Pre-load artifacts to reduce first-request latency. No separate exists() checks:
+    # load_artifacts opens the files and reports a missing one itself.
     try:
         logger.info("Pre-loading model artifacts...")
-        util.load_artifacts(CONFIG['COLUMNS_PATH'], CONFIG['MODEL_PATH'])
+        util.load_artifacts(CONFIG['COLUMNS_PATH'], CONFIG['MODEL_PATH'], CONFIG['MODEL_QUANT'])
         locations_count = len(util.get_location_names())
         logger.info(f"Artifacts loaded successfully. {locations_count} locations available.")
         return True
+    except FileNotFoundError as e:
+        logger.error(f"{e} (working directory: {os.getcwd()}). Server may not function correctly.")
+        return False
     except Exception as e:
         logger.error(f"Failed to pre-load artifacts: {e}")
         logger.warning("Server will attempt lazy loading on first request.")
@@ -283,8 +441,11 @@ def main():
     print(f"  • GET  http://localhost:{CONFIG['PORT']}/health                - Health check")
     print(f"  • GET  http://localhost:{CONFIG['PORT']}/get_location_names    - Get all locations") 
     print(f"  • POST http://localhost:{CONFIG['PORT']}/predict_home_price    - Predict property price")
+    print(f"  • POST http://localhost:{CONFIG['PORT']}/predict_home_price_batch - Predict prices for a list of properties")
+    print(f"  • GET  http://localhost:{CONFIG['PORT']}/cache_stats           - Prediction cache statistics")
     print("\n" + "=" * 60)
     
+    # Werkzeug development server; production runs gunicorn (see wsgi.py / gunicorn.conf.py)
     try:
         app.run(
             host=CONFIG['HOST'],
@@ -1,22 +1,117 @@
-import json
-import pickle
+import functools
+import hashlib
+import os
+import re
+import sys
+import threading
+import warnings
+import joblib
 import numpy as np
-import pandas as pd
+import orjson
 from pathlib import Path
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the numpy fill below is used instead
+    njit = None
+
+# The model is fed plain ndarrays (column order is checked once at load time),
+# so sklearn's "fitted with feature names" warning is expected noise.
+warnings.filterwarnings('ignore', message='X does not have valid feature names', category=UserWarning)
+
 # Globals for artifacts
 __columns = None             # original column names (list)
 __columns_lower = None       # lowercase for lookups
+__columns_index = None       # normalized column name -> index (O(1) location lookup)
 __locations = None           # location names (original case)
 __locations_lower = None     # lowercase locations for lookup
 __model = None
+__coef = None                # linear model weights (ndarray), None for other estimators
+__coef_values = None         # same weights as a list of floats, for scalar arithmetic
+__intercept = None
+
+# dtype of feature vectors handed to the model. Inputs are whole numbers and 0/1 one-hots,
+# exact in float32, and half the bytes of float64 (linear models still accumulate in float64).
+_FEATURE_DTYPE = np.float32
+
+# Location names in the dataset space commas inconsistently ("Villa ,Teachers Colony, Chandapura,Bangalore")
+_COMMA_SPACING = re.compile(r'\s*,\s*')
+
+# Per-thread reusable feature vector (Flask serves requests on several threads)
+__buffers = threading.local()
+
+class _OnnxModel:
+    """Minimal predict() wrapper around an ONNX Runtime session (see convert_model.py)."""
+
+    def __init__(self, session):
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+        self.n_features_in_ = session.get_inputs()[0].shape[1]
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)  # no copy for _FEATURE_DTYPE inputs
+        return self.session.run(None, {self.input_name: X})[0].ravel()
+
+
+def _load_onnx_model(onnx_path: str):
+    """
+    Open an ONNX model with ONNX Runtime.
+    The graph optimized on first load is saved next to the model as
+    <name>.<content hash>.opt.onnx (best effort) and reused on later starts for
+    faster session init. Keying on the model's contents, not its mtime, means a
+    replaced model never picks up a stale graph; an unreadable cache is discarded.
+    """
+    import onnxruntime as ort  # optional dependency, only needed for .onnx models
+
+    def session_options():
+        so = ort.SessionOptions()
+        # requests are already served concurrently; one ORT thread each avoids oversubscription
+        so.intra_op_num_threads = 1
+        so.inter_op_num_threads = 1
+        return so
+
+    providers = ['CPUExecutionProvider']
+    path = Path(onnx_path)
+    model_bytes = path.read_bytes()  # raises FileNotFoundError for a missing model
+    digest = hashlib.sha256(model_bytes).hexdigest()[:16]
+    optimized_path = path.with_name(f"{path.stem}.{digest}.opt.onnx")
+
+    if optimized_path.is_file():
+        so = session_options()
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        try:
+            return _OnnxModel(ort.InferenceSession(str(optimized_path), so, providers=providers))
+        except Exception:
+            # corrupt or truncated cache: drop it and rebuild from the source model
+            optimized_path.unlink(missing_ok=True)
+
+    so = session_options()
+    # ENABLE_ALL output may contain hardware-specific optimizations; the saved file
+    # can end up on another host (e.g. baked into an image), so keep it portable
+    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    # written under a temporary name and renamed, so a crash never leaves a partial cache
+    tmp_path = path.with_name(f"{path.stem}.{digest}.{os.getpid()}.tmp.onnx")
+    so.optimized_model_filepath = str(tmp_path)
+    try:
+        session = ort.InferenceSession(model_bytes, so, providers=providers)
+        os.replace(tmp_path, optimized_path)
+    except Exception:
+        # could not write the optimized graph (read-only directory, ...): serve without caching it
+        tmp_path.unlink(missing_ok=True)
+        session = ort.InferenceSession(model_bytes, session_options(), providers=providers)
+    return _OnnxModel(session)
 
-def load_artifacts(columns_path: str = './Columnsnew.json', model_path: str = './Real Estate Data V21.pickle'):
+
+def load_artifacts(columns_path: str = './Columnsnew.json', model_path: str = './Real Estate Data V21.pickle',
+                   quant: str = 'fp32'):
     """
     Load columns.json and the pickled model into module globals.
+    A model path ending in .onnx is served through ONNX Runtime instead;
+    quant='int8' then loads the quantized sibling (model.int8.onnx, see convert_model.py).
     Safe to call multiple times.
     """
-    global __columns, __columns_lower, __locations, __locations_lower, __model
+    global __columns, __columns_lower, __columns_index, __locations, __locations_lower, __model
+    global __coef, __coef_values, __intercept
 
     if __columns is not None and __model is not None:
         # already loaded
@@ -24,27 +119,75 @@ def load_artifacts(columns_path: str = './Columnsnew.json', model_path: str = '.
 
     print('Loading saved artifacts...')
 
-    # validate paths
-    if not Path(columns_path).exists():
-        raise FileNotFoundError(f"columns.json not found at {columns_path}")
-    if not Path(model_path).exists():
-        raise FileNotFoundError(f"Model pickle not found at {model_path}")
+    if quant not in ('fp32', 'int8'):
+        raise ValueError(f"Unknown quant '{quant}', expected 'fp32' or 'int8'")
+    if quant == 'int8':
+        if not model_path.endswith('.onnx'):
+            raise ValueError("quant='int8' requires an ONNX model path")
+        model_path = str(Path(model_path).with_suffix('.int8.onnx'))
+
+    # no separate exists() checks: opening the files reports a missing path anyway
+    try:
+        data = orjson.loads(Path(columns_path).read_bytes())
+    except FileNotFoundError as e:
+        raise FileNotFoundError(f"columns.json not found at {columns_path}") from e
+    # store original column names (case preserved)
+    columns = data.get('data_columns', [])
+    if not isinstance(columns, list) or len(columns) < 4:
+        raise ValueError("columns.json 'data_columns' missing or malformed")
+    # interned so every list/dict below shares one string object per name
+    columns = [sys.intern(c) for c in columns]
 
-    with open(columns_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        # store original column names (case preserved)
-        __columns = data.get('data_columns', [])
-        if not isinstance(__columns, list) or len(__columns) < 4:
-            raise ValueError("columns.json 'data_columns' missing or malformed")
+    # lowercase helper lists for reliable user input lookup
+    columns_lower = [sys.intern(c.strip().lower()) for c in columns]
+    # first occurrence wins, matching the old list.index() behaviour
+    columns_index = {}
+    for i, c in enumerate(columns_lower):
+        columns_index.setdefault(c, i)
+    # also accept any spacing around commas (exact names above take precedence)
+    for i, c in enumerate(columns_lower):
+        columns_index.setdefault(_COMMA_SPACING.sub(',', c), i)
+
+    # joblib reads plain pickles too; for models saved with convert_model.py the
+    # numpy arrays are memory-mapped read-only and shared through the page cache
+    try:
+        if model_path.endswith('.onnx'):
+            model = _load_onnx_model(model_path)
+        else:
+            model = joblib.load(model_path, mmap_mode='r')
+    except FileNotFoundError as e:
+        raise FileNotFoundError(f"Model pickle not found at {model_path}") from e
 
-        # lowercase helper lists for reliable user input lookup
-        __columns_lower = [c.lower() for c in __columns]
-        # locations are expected to start from index 3
-        __locations = __columns[3:]
-        __locations_lower = [c.lower() for c in __locations]
+    # the model is queried with raw arrays, so its training columns must line up with ours
+    feature_names = getattr(model, 'feature_names_in_', None)
+    if feature_names is not None and list(feature_names) != columns:
+        raise ValueError("Model feature names do not match columns.json 'data_columns'")
+    n_features = getattr(model, 'n_features_in_', None)
+    if isinstance(n_features, int) and n_features != len(columns):
+        raise ValueError("Model input width does not match columns.json 'data_columns'")
 
-    with open(model_path, 'rb') as f:
-        __model = pickle.load(f)
+    # An input has at most 4 non-zero features (3 numeric + 1 location one-hot), so for
+    # linear models a prediction is a 4-term sparse dot product instead of a full predict()
+    coef = coef_values = intercept = None
+    if not isinstance(model, _OnnxModel):
+        # imported here so ONNX deployments don't load sklearn
+        from sklearn.linear_model import ElasticNet, Lasso, LinearRegression, Ridge
+        # exact types whose predict() is X @ coef_ + intercept_; a subclass may override predict()
+        if type(model) in (LinearRegression, Ridge, Lasso, ElasticNet):
+            weights = np.asarray(model.coef_, dtype=float)
+            if weights.shape == (len(columns),) and np.ndim(model.intercept_) == 0:
+                coef = weights
+                coef_values = weights.tolist()
+                intercept = float(model.intercept_)
+
+    # publish only once every check passed, so a rejected model is never left half-loaded
+    __columns, __columns_lower, __columns_index = columns, columns_lower, columns_index
+    # locations are expected to start from index 3
+    __locations = columns[3:]
+    __locations_lower = columns_lower[3:]
+    __coef, __coef_values, __intercept = coef, coef_values, intercept
+    __model = model
+    _predict_price_cached.cache_clear()
 
     print('Artifacts loaded successfully.')
 
@@ -59,6 +202,74 @@ def get_location_names():
     return __locations or []
 
 
+def _feature_vector():
+    """
+    Return this thread's feature vector, allocating it on first use.
+    Only the numeric slots and one location slot change between calls,
+    so the caller resets the previous one-hot instead of re-zeroing.
+    """
+    x_array = getattr(__buffers, 'x', None)
+    if x_array is None or len(x_array) != len(__columns):
+        x_array = __buffers.x = np.zeros(len(__columns), dtype=_FEATURE_DTYPE)
+        __buffers.last_loc_index = -1
+    return x_array
+
+
+def _location_index(location: str) -> int:
+    """Column index of the location's one-hot feature, or -1 if unknown."""
+    # normalize location for lookup
+    loc = (location or "").strip().lower()
+
+    loc_index = __columns_index.get(loc, -1)
+    if loc_index < 0 and ',' in loc:
+        # retry with canonical comma spacing (only on a miss, to keep the regex off the common path)
+        loc_index = __columns_index.get(_COMMA_SPACING.sub(',', loc), -1)
+    if loc_index < 3:
+        return -1  # not found (or not a location column)
+    return loc_index
+
+
+@functools.lru_cache(maxsize=8192)
+def _predict_price_cached(loc_index: int, sqft: int, bhk: int, baths: int) -> float:
+    """
+    Raw model output (rupees) for an already-encoded input.
+    Memoized: UI sliders repeat the same (location, sqft, bhk, bath) queries a lot.
+    """
+    if __coef_values is not None:
+        # linear model: only the non-zero features contribute
+        predicted_price = (__intercept + __coef_values[0] * sqft
+                           + __coef_values[1] * bhk + __coef_values[2] * baths)
+        if loc_index >= 3:
+            predicted_price += __coef_values[loc_index]
+        return predicted_price
+
+    # reuse this thread's feature vector (_FEATURE_DTYPE)
+    x_array = _feature_vector()
+
+    # NOTE: this assumes the first three columns are [total_sqft, bhk, bath]
+    x_array[0] = sqft
+    x_array[1] = bhk
+    x_array[2] = baths
+
+    # clear the previous request's location one-hot, then set ours
+    last_loc_index = __buffers.last_loc_index
+    if last_loc_index >= 3:
+        x_array[last_loc_index] = 0.0
+    if loc_index >= 3:
+        x_array[loc_index] = 1.0
+    __buffers.last_loc_index = loc_index
+
+    # predict (a 1-row ndarray; no per-request DataFrame construction)
+    return float(__model.predict(x_array.reshape(1, -1))[0])
+
+
+def format_price(predicted_price: float) -> str:
+    """Format a rupee amount as 'Rs. X Lakhs' / 'Rs. Y Crs'."""
+    if predicted_price >= 1e7:  # >= 1 crore
+        return f"Estimated Price is: Rs. {predicted_price / 1e7:.2f} Crs"
+    return f"Estimated Price is: Rs. {predicted_price / 1e5:.2f} Lakhs"
+
+
 def predict_price(location: str, sqft: float, bhk: int, baths: int):
     """
     Predict price for given inputs.
@@ -66,7 +277,7 @@ def predict_price(location: str, sqft: float, bhk: int, baths: int):
     Lazy-loads artifacts if necessary.
     Assumes the model's output is in rupees.
     """
-    global __columns, __columns_lower, __model
+    global __columns, __columns_index, __model
 
     # lazy load
     if __columns is None or __model is None:
@@ -75,38 +286,77 @@ def predict_price(location: str, sqft: float, bhk: int, baths: int):
     if __model is None or __columns is None:
         raise RuntimeError("Model or columns not loaded. Call load_artifacts() first.")
 
-    # normalize location for lookup
-    loc = (location or "").strip().lower()
+    loc_index = _location_index(location)
 
-    try:
-        loc_index = __columns_lower.index(loc)
-    except ValueError:
-        loc_index = -1  # not found
+    # sqft is rounded to whole feet so near-identical slider values share a cache entry
+    predicted_price = _predict_price_cached(loc_index, int(round(float(sqft))), int(bhk), int(baths))
 
-    # prepare feature vector (float dtype)
-    x_array = np.zeros(len(__columns), dtype=float)
+    # format (assuming model outputs rupees)
+    return format_price(predicted_price)
 
-    # NOTE: this assumes the first three columns are [total_sqft, bhk, bath]
-    x_array[0] = float(sqft)
-    x_array[1] = int(bhk)
-    x_array[2] = int(baths)
 
-    if loc_index >= 0:
-        x_array[loc_index] = 1.0
+if njit is not None:
+    # compiled once per machine (cache=True); nogil lets threaded requests fill in parallel
+    @njit(cache=True, nogil=True)
+    def _fill_batch(X, sqfts, bhks, baths, loc_indices):
+        """Write numeric features and location one-hots into the zeroed (n, columns) matrix X."""
+        for i in range(X.shape[0]):
+            X[i, 0] = sqfts[i]
+            X[i, 1] = bhks[i]
+            X[i, 2] = baths[i]
+            loc_index = loc_indices[i]
+            if loc_index >= 3:
+                X[i, loc_index] = 1.0
+else:
+    def _fill_batch(X, sqfts, bhks, baths, loc_indices):
+        """Write numeric features and location one-hots into the zeroed (n, columns) matrix X."""
+        X[:, 0] = sqfts
+        X[:, 1] = bhks
+        X[:, 2] = baths
+        # set all location one-hots with a single fancy-index write
+        rows = np.flatnonzero(loc_indices >= 3)
+        X[rows, loc_indices[rows]] = 1.0
 
-    # IMPORTANT: build DataFrame with the original column names so sklearn sees valid feature names
-    x_df = pd.DataFrame([x_array], columns=__columns)
 
-    # predict
-    predicted_price = __model.predict(x_df)[0]
+def predict_prices(items: list):
+    """
+    Predict prices for many inputs with a single model call.
+    items: sequence of (location, sqft, bhk, baths) tuples.
+    Returns an array of raw predictions (rupees), one per item.
+    """
+    global __columns, __model
+
+    # lazy load
+    if __columns is None or __model is None:
+        load_artifacts()
+
+    if __model is None or __columns is None:
+        raise RuntimeError("Model or columns not loaded. Call load_artifacts() first.")
+
+    n = len(items)
+
+    # same column layout and sqft rounding as predict_price
+    sqfts = np.fromiter((round(float(item[1])) for item in items), dtype=float, count=n)
+    bhks = np.fromiter((int(item[2]) for item in items), dtype=float, count=n)
+    baths = np.fromiter((int(item[3]) for item in items), dtype=float, count=n)
+    loc_indices = np.fromiter((_location_index(item[0]) for item in items), dtype=np.intp, count=n)
+
+    if __coef is not None:
+        # linear model: sparse dot product, no (n, columns) matrix needed
+        prices = __intercept + sqfts * __coef[0] + bhks * __coef[1] + baths * __coef[2]
+        rows = np.flatnonzero(loc_indices >= 3)
+        prices[rows] += __coef[loc_indices[rows]]
+        return prices
+
+    X = np.zeros((n, len(__columns)), dtype=_FEATURE_DTYPE)
+    _fill_batch(X, sqfts, bhks, baths, loc_indices)
+
+    return __model.predict(X)
 
-    # format (assuming model outputs rupees)
-    if predicted_price >= 1e7:  # >= 1 crore
-        formatted_price = f"Estimated Price is: Rs. {predicted_price / 1e7:.2f} Crs"
-    else:
-        formatted_price = f"Estimated Price is: Rs. {predicted_price / 1e5:.2f} Lakhs"
 
-    return formatted_price
+def get_cache_stats():
+    """Hit/miss counters of the prediction cache."""
+    return _predict_price_cached.cache_info()._asdict()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,24 @@
+"""
+WSGI entry point for production servers.
+
+Model artifacts are loaded at import time, so with gunicorn's --preload they
+are read once in the master process and shared copy-on-write by the forked
+workers instead of every worker unpickling the model again:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Model arrays loaded from a joblib file (convert_model.py) are memory-mapped,
+so their pages live in the page cache and are shared even across restarts.
+"""
+
+import gc
+
+from server import app, initialize_server
+
+initialize_server()
+
+# Move everything loaded so far into the GC's permanent generation. Collections
+# in the workers then never walk (and write to) these objects' headers, so the
+# pages holding the model, column lists and lookup dicts stay shared instead of
+# being copied into every worker.
+gc.freeze()